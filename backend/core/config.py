@@ -1,39 +1,75 @@
 import os
+import re
+import functools
+import ipaddress
+import shutil
 import yaml
 import logging
 from typing import Dict, List, Optional, Any
-import time
 
-# Singleton instance of config
-_config_instance = None
+# Prefer the libyaml-backed C loader/dumper, falling back to the pure-Python ones
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+if _YamlLoader is yaml.SafeLoader:
+    # Module logger, not logging.warning(): that would configure the root logger
+    # before setup_logging() runs and make it skip the file handler
+    logging.getLogger(__name__).warning("libyaml not available, falling back to pure-Python YAML parser")
+
+# Extracts the host from a notification endpoint such as http://192.168.1.50:7507/play
+_NOTIF_ENDPOINT_RE = re.compile(r'http://([^:]+):\d+/play')
+
+@functools.lru_cache(maxsize=32)
+def _valid_ip(address: str) -> bool:
+    """Check whether address is a valid IPv4/IPv6 address"""
+    try:
+        ipaddress.ip_address(address)
+        return True
+    except ValueError:
+        return False
+
+# Buffer size for config file reads/writes
+_IO_BUFFER_SIZE = 65536
 
 class Config:
     def __init__(self, config_file: str = "config.yaml"):
         self.config_file = config_file
         self.data = {}
+        self._public_view = None  # Cached result of get_all()
         self.load_config()
+        self._apply_data()
+    
+    def _apply_data(self) -> None:
+        """Refresh instance attributes from the in-memory configuration data"""
+        # Resolve each section once
+        general = self.data.get('general') or {}
+        adb = self.data.get('adb') or {}
+        logcat = adb.get('logcat') or {}
+        notification_data = self.data.get('notification') or {}
         
         # General settings
-        self.log_level = self.data.get('general', {}).get('log_level', 'INFO')
-        self.event_cooldown = self.data.get('general', {}).get('cooldown_seconds', 3)
-        self.enable_watcher = self.data.get('general', {}).get('enable_watcher', True)  # Default to enabled
+        self.log_level = general.get('log_level', 'INFO')
+        self.event_cooldown = general.get('cooldown_seconds', 3)
+        self.enable_watcher = general.get('enable_watcher', True)  # Default to enabled
         
         # ADB settings
-        self.adb_device_ip = self.data.get('adb', {}).get('device_ip')
+        self.adb_device_ip = adb.get('device_ip')
         # Construct device_id from IP and fixed port 5555
         self.adb_device_id = f"{self.adb_device_ip}:5555" if self.adb_device_ip else None
-        self.adb_logcat_pattern = self.data.get('adb', {}).get('logcat', {}).get('pattern', '')
-        self.adb_logcat_buffer = self.data.get('adb', {}).get('logcat', {}).get('buffer', 'system')
-        self.adb_logcat_tags = self.data.get('adb', {}).get('logcat', {}).get('tags', 'ActivityTaskManager:I')
+        self.adb_logcat_pattern = logcat.get('pattern', '')
+        self.adb_logcat_buffer = logcat.get('buffer', 'system')
+        self.adb_logcat_tags = logcat.get('tags', 'ActivityTaskManager:I')
         
         # Path mappings
-        self.path_mappings = []
-        for mapping in self.data.get('mapping_paths', []):
-            if isinstance(mapping, dict) and 'source' in mapping and 'target' in mapping:
-                self.path_mappings.append(mapping)
+        self.path_mappings = [
+            m for m in self.data.get('mapping_paths') or []
+            if isinstance(m, dict) and 'source' in m and 'target' in m
+        ]
+        # (source, len(source), target) tuples for the log-line parser
+        self.path_mappings_compiled = tuple(
+            (m['source'], len(m['source']), m['target']) for m in self.path_mappings
+        )
         
         # Notification settings
-        notification_data = self.data.get('notification', {})
         self.notification_endpoint = notification_data.get('endpoint')
         self.notification_timeout = notification_data.get('timeout_seconds', 10)
     
@@ -42,8 +78,10 @@ class Config:
         config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', self.config_file)
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self.data = yaml.safe_load(f)
+            # Read the whole file as bytes and let libyaml decode it
+            with open(config_path, 'rb', buffering=_IO_BUFFER_SIZE) as f:
+                raw = f.read()
+            self.data = yaml.load(raw, Loader=_YamlLoader)
             logging.debug(f"Configuration loaded from {config_path}")
         except FileNotFoundError:
             logging.error(f"Configuration file not found: {config_path}")
@@ -54,41 +92,50 @@ class Config:
     
     def save_config(self) -> bool:
         """Save configuration to YAML file"""
+        self._public_view = None
         config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', self.config_file)
         
+        tmp_path = f"{config_path}.tmp"
         try:
-            # Create a backup of the file first
+            # Write the configuration to a temp file with explicit flush and fsync
+            raw = yaml.dump(self.data, Dumper=_YamlDumper, default_flow_style=False, encoding='utf-8')
+            with open(tmp_path, 'wb', buffering=_IO_BUFFER_SIZE) as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            # Keep the previous file as a backup (hardlink, copy only if linking is unsupported)
             backup_path = f"{config_path}.bak"
             try:
                 if os.path.exists(config_path):
-                    with open(config_path, 'r', encoding='utf-8') as src:
-                        with open(backup_path, 'w', encoding='utf-8') as dst:
-                            dst.write(src.read())
+                    if os.path.exists(backup_path):
+                        os.remove(backup_path)
+                    try:
+                        os.link(config_path, backup_path)
+                    except OSError:
+                        shutil.copyfile(config_path, backup_path)
             except Exception as e:
                 logging.warning(f"Failed to create backup of config file: {e}")
-                
-            # Write the configuration with explicit flush and fsync
-            with open(config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(self.data, f, default_flow_style=False)
-                f.flush()
-                os.fsync(f.fileno())
-                
-            # Verify the file was written
-            time.sleep(0.1)  # Brief pause to ensure file system operations complete
-            with open(config_path, 'r', encoding='utf-8') as f:
-                written_data = yaml.safe_load(f)
-                if written_data != self.data:
-                    logging.error("Configuration verification failed - written data doesn't match")
-                    return False
+            
+            # Keep the original file's permissions, then atomically swap the new file into place
+            if os.path.exists(config_path):
+                shutil.copymode(config_path, tmp_path)
+            os.replace(tmp_path, config_path)
                     
             logging.debug(f"Configuration saved to {config_path}")
             return True
         except Exception as e:
             logging.error(f"Error saving configuration: {e}")
+            # Don't leave a partial temp file behind
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
             return False
     
     def update_config(self, new_config: Dict[str, Any]) -> bool:
         """Update configuration with new values"""
+        self._public_view = None
         try:
             # Update the data dictionary with new values
             self.data.update(new_config)
@@ -99,25 +146,19 @@ class Config:
                 device_ip = new_config['adb']['device_ip']
                 if device_ip:
                     # Validate IP format
-                    import ipaddress
-                    try:
-                        ipaddress.ip_address(device_ip)
-                        # Keep device_ip in the config
-                        self.data['adb']['device_ip'] = device_ip
-                    except ValueError:
+                    if not _valid_ip(device_ip):
                         logging.error(f"Invalid IP address format: {device_ip}")
                         return False
+                    # Keep device_ip in the config
+                    self.data['adb']['device_ip'] = device_ip
             
             # Save to file immediately
             if not self.save_config():
                 logging.error("Failed to save configuration after update")
                 return False
                 
-            # Reload the configuration to ensure instance properties are updated with actual saved values
-            self.load_config()
-            
-            # Refresh instance properties
-            self.__init__(self.config_file)
+            # Refresh instance properties from the data we just saved
+            self._apply_data()
             
             return True
         except Exception as e:
@@ -126,6 +167,9 @@ class Config:
     
     def get_all(self) -> Dict[str, Any]:
         """Get entire configuration as dictionary"""
+        if self._public_view is not None:
+            return self._public_view
+        
         # Ensure device_ip is included in the response for frontend compatibility
         config_data = self.data.copy()
         if 'adb' in config_data and 'device_ip' not in config_data['adb']:
@@ -142,18 +186,18 @@ class Config:
         if 'notification' in config_data and 'endpoint' in config_data['notification']:
             endpoint = config_data['notification']['endpoint']
             if endpoint:
-                import re
-                match = re.match(r'http://([^:]+):\d+/play', endpoint)
+                match = _NOTIF_ENDPOINT_RE.match(endpoint)
                 if match:
                     config_data['notification']['ip'] = match.group(1)
         
+        self._public_view = config_data
         return config_data
         
+@functools.lru_cache(maxsize=8)
+def _build_config(config_file: str) -> Config:
+    """Create the shared Config instance for a config file"""
+    return Config(config_file)
+
 def get_config(config_file: str = None) -> Config:
     """Get singleton instance of Config"""
-    global _config_instance
-    
-    if _config_instance is None or config_file is not None:
-        _config_instance = Config(config_file or "config.yaml")
-    
-    return _config_instance 
\ No newline at end of file
+    return _build_config(config_file or "config.yaml")
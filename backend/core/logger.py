@@ -7,8 +7,10 @@ from backend.core.config import get_config
 class ADBProtocolFilter(logging.Filter):
     """Filter to exclude ADB protocol logs"""
     def filter(self, record):
-        # Exclude logs containing ADB protocol messages
-        if record.getMessage().startswith(('bulk_write', 'bulk_read')):
+        # Exclude logs containing ADB protocol messages; check the unformatted
+        # template so discarded records never pay for msg % args
+        msg = record.msg
+        if isinstance(msg, str) and msg.startswith(('bulk_write', 'bulk_read')):
             return False
         return True
 
@@ -1,11 +1,23 @@
 #!/usr/bin/env python3
 import re
+import logging
+import orjson
 import requests
-import json
+from requests.adapters import HTTPAdapter
 from backend.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Captures the dat= value of a logcat line, up to the next intent parameter
+_DAT_RE = re.compile(r'dat=(.*?)(?=\s+(?:cmp|typ|flg|act|cat|pkg)=|$)')
+# Android storage roots that precede the media path in a content URI
+_ANDROID_STORAGE_RE = re.compile(r'externalstorage/|storage/emulated/0/')
+
+# Shared HTTP session so notifications reuse keep-alive connections
+_session = requests.Session()
+_session.headers.update({'Content-Type': 'application/json; charset=utf-8'})
+_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
 def send_http_notification(endpoint, file_path, timeout=10, device_ip=None):
     """Send HTTP notification to the configured endpoint.
     
@@ -24,23 +36,21 @@ def send_http_notification(endpoint, file_path, timeout=10, device_ip=None):
     
     try:
         payload = {"file_path": file_path}
-        headers = {'Content-Type': 'application/json; charset=utf-8'}
         
-        logger.debug(f"Sending notification to {endpoint}: {payload}")
-        response = requests.post(
+        logger.debug("Sending notification to %s: %s", endpoint, payload)
+        response = _session.post(
             endpoint, 
-            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
-            headers=headers,
+            data=orjson.dumps(payload),
             timeout=timeout
         )
         
         # Log the notification result
         if response.status_code >= 200 and response.status_code < 300:
             logger.info(f"Successfully sent notification for {file_path}")
-            logger.debug(f"Response: {response.status_code} {response.text}")
+            logger.debug("Response: %s %s", response.status_code, response.text)
         else:
             logger.error(f"Failed to send notification: HTTP {response.status_code}")
-            logger.debug(f"Response: {response.text}")
+            logger.debug("Response: %s", response.text)
         
         # Execute send_stop_key_request for all cases except HTTP 503
         if device_ip and response.status_code != 503:
@@ -60,14 +70,14 @@ def send_stop_key_request(device_ip):
         headers = {'Content-Type': 'application/json'}
         
         logger.info(f"Sending stop key request to {url}")
-        response = requests.get(url, headers=headers, timeout=5)
+        response = _session.get(url, headers=headers, timeout=5)
         
         if response.status_code >= 200 and response.status_code < 300:
             logger.info(f"Successfully sent stop key request to {device_ip}")
-            logger.debug(f"Stop key response: {response.status_code} {response.text}")
+            logger.debug("Stop key response: %s %s", response.status_code, response.text)
         else:
             logger.error(f"Failed to send stop key request: HTTP {response.status_code}")
-            logger.debug(f"Stop key response: {response.text}")
+            logger.debug("Stop key response: %s", response.text)
             
     except Exception as e:
         logger.error(f"Error sending stop key request to {device_ip}: {str(e)}")
@@ -76,41 +86,36 @@ def extract_path_from_dat(dat_string, path_mappings=None):
     """Extracts the path portion from a 'dat=' URL string.
     
     Args:
-        dat_string: The string containing a dat= parameter
-        path_mappings: A list of dictionaries with 'source' and 'target' keys for path mapping
+        dat_string: The dat= value, already stripped of trailing intent parameters
+        path_mappings: (source, len(source), target) tuples, see Config.path_mappings_compiled
     
     Returns:
         str: The extracted path, or None if extraction failed
     """
-    # First, clean the dat_string by removing any typ= or flg= parameters and anything after them
     clean_dat = dat_string
-    for param in [' typ=', ' flg=', ' act=', ' cat=', ' pkg=']:
-        param_pos = clean_dat.find(param)
-        if param_pos != -1:
-            clean_dat = clean_dat[:param_pos]
     
     # Check if the path matches any of the configured path mappings
     if path_mappings:
-        for mapping in path_mappings:
-            source = mapping['source']
-            if source in clean_dat:
+        for source, source_len, target in path_mappings:
+            source_pos = clean_dat.find(source)
+            if source_pos != -1:
                 # Extract the part after the source base path
-                remaining_path = clean_dat[clean_dat.find(source) + len(source):]
+                remaining_path = clean_dat[source_pos + source_len:]
                 
                 # Clean up the remaining path
                 remaining_path = remaining_path.strip('/ ')
                 
                 # Combine with the target path
-                target = mapping['target']
                 full_path = f"{target}{remaining_path}"
                 
-                logger.debug(f"Using path mapping: {source} -> {target}")
-                logger.debug(f"Full path: {full_path}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Using path mapping: %s -> %s", source, target)
+                    logger.debug("Full path: %s", full_path)
                 
                 return full_path
     
     # If no mapping matches, use the default # separator method
-    if not 'content://' in clean_dat:
+    if 'content://' not in clean_dat:
         return None
         
     # Find the # character which separates the authority from the path
@@ -120,26 +125,18 @@ def extract_path_from_dat(dat_string, path_mappings=None):
         path_part = clean_dat[hash_pos + 1:]
         return path_part.strip('/ ')
     
-    # Check for common Android storage paths
-    # 1. External storage
-    external_pos = clean_dat.find('externalstorage/')
-    if external_pos != -1:
-        path_part = clean_dat[external_pos + len('externalstorage/'):]
-        logger.debug(f"Extracted path using externalstorage/ marker: {path_part}")
-        return path_part.strip('/ ')
-    
-    # 2. Emulated storage
-    emulated_pos = clean_dat.find('storage/emulated/0/')
-    if emulated_pos != -1:
-        path_part = clean_dat[emulated_pos + len('storage/emulated/0/'):]
-        logger.debug(f"Extracted path using storage/emulated/0/ marker: {path_part}")
+    # Check for common Android storage paths (external or emulated storage)
+    storage_match = _ANDROID_STORAGE_RE.search(clean_dat)
+    if storage_match:
+        path_part = clean_dat[storage_match.end():]
+        logger.debug("Extracted path using %s marker: %s", storage_match.group(0), path_part)
         return path_part.strip('/ ')
     
-    # 3. Last resort: try to extract after the last slash
+    # Last resort: try to extract after the last slash
     last_slash_pos = clean_dat.rfind('/')
     if last_slash_pos != -1:
         path_part = clean_dat[last_slash_pos + 1:]
-        logger.debug(f"Extracted path using last slash fallback: {path_part}")
+        logger.debug("Extracted path using last slash fallback: %s", path_part)
         return path_part.strip('/ ')
     
     # If all extraction methods fail
@@ -150,30 +147,23 @@ def parse_video_path(line, path_mappings=None):
     
     Args:
         line: The log line to parse
-        path_mappings: A list of dictionaries with 'source' and 'target' keys for path mapping
+        path_mappings: (source, len(source), target) tuples, see Config.path_mappings_compiled
     
     Returns:
         str: The extracted path, or None if extraction failed
     """
-    # First, find the 'dat=' parameter in the log line
-    dat_pos = line.find('dat=')
-    if dat_pos == -1:
+    # Find the dat= value, cut at the next intent parameter (cmp=, typ=, flg=, ...)
+    match = _DAT_RE.search(line)
+    if not match:
         return None
-        
-    # Extract the content URI part starting with 'dat='
-    dat_part = line[dat_pos:]
-    
-    # Find where the dat parameter ends
-    space_after_dat = dat_part.find(' cmp=')
-    if space_after_dat != -1:
-        dat_part = dat_part[:space_after_dat]
+    dat_part = match.group(1)
     
     # Extract the actual path from the dat parameter
     path = extract_path_from_dat(dat_part, path_mappings)
     
     # Print debug info for troubleshooting
-    if path:
-        logger.debug(f"EXTRACTED PATH: {path}")
-        logger.debug(f"FROM DAT PART: {dat_part}")
+    if path and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("EXTRACTED PATH: %s", path)
+        logger.debug("FROM DAT PART: %s", dat_part)
     
     return path 
\ No newline at end of file
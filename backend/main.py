@@ -53,6 +53,11 @@ async def startup_event():
     except Exception as e:
         logger.exception(f"Error auto-starting monitoring: {str(e)}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background watcher tasks so they don't hold up interpreter exit"""
+    api.shutdown_background_executor()
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
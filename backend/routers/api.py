@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
-import re
+from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import ipaddress
 
-from backend.core.config import get_config
+from backend.core.config import Config, get_config
 from backend.core.logger import get_logger
 from backend.services.adbwatcher import get_watcher
 from backend.services.adbhandler import ADBHandler
@@ -11,6 +13,43 @@ from backend.services.adbhandler import ADBHandler
 router = APIRouter()
 logger = get_logger(__name__)
 
+# Dedicated workers for watcher start/restart, which can take seconds, so they
+# don't tie up the threadpool that serves requests
+_background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='adbwatcher-bg')
+
+def _run_in_background(func):
+    """Run func on the background executor, logging any exception it raises"""
+    def log_failure(future):
+        # Tasks cancelled at shutdown have no result to report
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.error(f"Background task {func.__name__} failed: {exc}", exc_info=exc)
+    
+    _background_executor.submit(func).add_done_callback(log_failure)
+
+def shutdown_background_executor():
+    """Drop queued background tasks and stop the executor without waiting on running ones"""
+    _background_executor.shutdown(wait=False, cancel_futures=True)
+
+# Device address validation for /test/adb
+def _is_ipv4(value: str) -> bool:
+    """Check for a dotted IPv4 address such as 192.168.1.100"""
+    try:
+        ipaddress.IPv4Address(value)
+        return True
+    except ValueError:
+        return False
+
+def _is_ipv4_port(value: str) -> bool:
+    """Check for an IPv4 address with port such as 192.168.1.100:5555"""
+    host, _, port = value.rpartition(':')
+    # Bound the length before int() (same 1-5 digits as the old regex); very long
+    # digit strings make int() raise instead of returning a number
+    return (_is_ipv4(host) and 0 < len(port) <= 5 and port.isascii() and port.isdigit()
+            and 0 < int(port) <= 65535)
+
 # Models
 class StatusResponse(BaseModel):
     is_running: bool
@@ -38,19 +77,26 @@ class CommandResponse(BaseModel):
     message: str
 
 
+async def current_config() -> Config:
+    """Dependency providing the shared Config, resolved once per request"""
+    # async so FastAPI calls it inline instead of dispatching it to the threadpool
+    return get_config()
+
 # Routes
+# Handlers that end up in blocking calls (adb subprocesses, thread joins, config
+# file writes) are plain `def` so FastAPI runs them in its threadpool; only
+# handlers that touch in-memory state are `async def`.
+# See https://fastapi.tiangolo.com/async/#path-operation-functions
 @router.get("/status", response_model=StatusResponse)
-async def get_status():
+def get_status():
     """Get current status of the adb watcher"""
     watcher = get_watcher()
     return watcher.get_watcher_status()
 
 @router.post("/start", response_model=CommandResponse)
-async def start_monitoring(background_tasks: BackgroundTasks):
+def start_monitoring(config: Config = Depends(current_config)):
     """Start ADB monitoring"""
     # First, update the config to enable the watcher
-    config = get_config()
-    
     # Set enable_watcher to True if it wasn't already
     if not config.enable_watcher:
         logger.info("Enabling ADB monitoring in configuration")
@@ -64,7 +110,7 @@ async def start_monitoring(background_tasks: BackgroundTasks):
         if not success:
             logger.error("Failed to start monitoring")
     
-    background_tasks.add_task(start_task)
+    _run_in_background(start_task)
     
     return {
         "success": True,
@@ -72,11 +118,9 @@ async def start_monitoring(background_tasks: BackgroundTasks):
     }
 
 @router.post("/stop", response_model=CommandResponse)
-async def stop_monitoring():
+def stop_monitoring(config: Config = Depends(current_config)):
     """Stop ADB monitoring"""
     # First, update the config to disable the watcher
-    config = get_config()
-    
     # Set enable_watcher to False if it wasn't already
     if config.enable_watcher:
         logger.info("Disabling ADB monitoring in configuration")
@@ -91,7 +135,7 @@ async def stop_monitoring():
     }
 
 @router.post("/restart", response_model=CommandResponse)
-async def restart_monitoring(background_tasks: BackgroundTasks):
+async def restart_monitoring():
     """Restart ADB monitoring"""
     watcher = get_watcher()
     
@@ -101,44 +145,43 @@ async def restart_monitoring(background_tasks: BackgroundTasks):
         if not success:
             logger.error("Failed to restart monitoring")
     
-    background_tasks.add_task(restart_task)
+    _run_in_background(restart_task)
     
     return {
         "success": True,
         "message": "Restarting monitoring..."
     }
 
-@router.get("/logs", response_model=List[str])
+@router.get("/logs")
 async def get_logs(count: int = 100):
     """Get recent logs from the buffer"""
     watcher = get_watcher()
-    return watcher.get_raw_logs(count)
+    return ORJSONResponse(watcher.get_raw_logs(count))
 
 @router.get("/filtered_logs")
 async def get_filtered_logs(count: int = 50):
     """Get only important logs with original events and mapped paths"""
     watcher = get_watcher()
-    return watcher.get_event_logs(count)
+    return ORJSONResponse(watcher.get_event_logs(count))
 
 @router.get("/config", response_model=ConfigResponse)
-async def get_config_data():
+async def get_config_data(config: Config = Depends(current_config)):
     """Get current configuration"""
-    config = get_config()
-    return {
+    # Returned directly so the cached dict is serialized by orjson without re-validation
+    return ORJSONResponse({
         "config": config.get_all()
-    }
+    })
 
 @router.post("/config", response_model=CommandResponse)
-async def update_config(config_data: ConfigUpdateRequest, background_tasks: BackgroundTasks):
+def update_config(config_data: ConfigUpdateRequest, config: Config = Depends(current_config)):
     """Update configuration"""
-    config = get_config()
     success = config.update_config(config_data.config)
     
     if success:
         # Restart watcher if it's running
         watcher = get_watcher()
         if watcher.is_running:
-            background_tasks.add_task(watcher.restart_service)
+            _run_in_background(watcher.restart_service)
     
     return {
         "success": success,
@@ -146,14 +189,13 @@ async def update_config(config_data: ConfigUpdateRequest, background_tasks: Back
     }
 
 @router.post("/test/adb", response_model=TestADBResponse)
-async def test_adb_connection(device_id: Optional[str] = None):
+def test_adb_connection(device_id: Optional[str] = None):
     """Test ADB connection"""
     # Validate device_id format if provided
     if device_id:
         # Check if it's in IP:PORT format
         if ':' in device_id:
-            ip_pattern = re.compile(r'^(\d{1,3}\.){3}\d{1,3}:\d{1,5}$')
-            if not ip_pattern.match(device_id):
+            if not _is_ipv4_port(device_id):
                 return {
                     "status": "error",
                     "message": "Invalid IP:PORT format. Please use format like 192.168.1.100:5555",
@@ -161,8 +203,7 @@ async def test_adb_connection(device_id: Optional[str] = None):
                 }
         else:
             # Just IP address
-            ip_pattern = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
-            if not ip_pattern.match(device_id):
+            if not _is_ipv4(device_id):
                 return {
                     "status": "error",
                     "message": "Invalid IP format. Please use format like 192.168.1.100",
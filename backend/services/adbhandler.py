@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import socket
+import functools
 import subprocess
 import logging
 import time
@@ -18,6 +20,50 @@ from adb_shell.exceptions import AdbConnectionError, AdbTimeoutError
 
 logger = get_logger(__name__)
 
+# subprocess options for adb commands whose output is never inspected: no pipes to drain
+_QUIET_RUN = dict(stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+# Socket options for the in-process session: no Nagle delay on small ADB packets, and
+# keepalive plus a user timeout so a vanished device fails the socket within seconds.
+# Options the platform doesn't define are skipped
+SESSION_SOCKET_OPTIONS = (
+    (socket.IPPROTO_TCP, 'TCP_NODELAY', 1),
+    (socket.SOL_SOCKET, 'SO_KEEPALIVE', 1),
+    (socket.IPPROTO_TCP, 'TCP_KEEPIDLE', 3),
+    (socket.IPPROTO_TCP, 'TCP_KEEPINTVL', 2),
+    (socket.IPPROTO_TCP, 'TCP_KEEPCNT', 2),
+    (socket.IPPROTO_TCP, 'TCP_USER_TIMEOUT', 5000),  # milliseconds
+)
+
+# RSA key shared with the adb server, so a device that already trusts it needs no new prompt
+ADB_KEY_PATH = Path.home() / '.android' / 'adbkey'
+
+@functools.lru_cache(maxsize=4)
+def _get_signer(key_path, mtime_ns):
+    """Parse the key pair at key_path; mtime_ns keys the cache so a replaced key is re-read"""
+    pub_path = Path(f"{key_path}.pub")
+    priv = key_path.read_text()
+    pub = pub_path.read_text() if pub_path.exists() else None
+    return PythonRSASigner(pub, priv)
+
+def load_adb_signer(key_path=ADB_KEY_PATH):
+    """Load the ADB RSA key pair, generating one if it doesn't exist yet"""
+    key_path = Path(key_path)
+    if not key_path.exists():
+        logger.info(f"Generating ADB key at {key_path}")
+        key_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # keygen() writes with a plain open(), which would leave the private key readable
+        # under the umask; create it owner-only first so the truncating write keeps 0600
+        os.close(os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        try:
+            keygen(str(key_path))
+        except Exception:
+            key_path.unlink(missing_ok=True)
+            raise
+    
+    # Handlers for every device share one parsed signer per key
+    return _get_signer(key_path, key_path.stat().st_mtime_ns)
+
 class ADBHandler:
     # Registry to keep track of instances by device_id
     _instances = {}
@@ -29,29 +75,36 @@ class ADBHandler:
         Get or create an ADBHandler instance for the specified device_id
         If no device_id is provided, it will use the default from config
         """
-        with cls._lock:
+        config = None
+        if not device_id:
             config = get_config()
-            device_id = device_id or config.adb_device_id
-            
-            # If instance doesn't exist for this device_id, create it
-            if device_id not in cls._instances:
-                cls._instances[device_id] = cls(device_id, _use_registry=True)
+            device_id = config.adb_device_id
+        
+        # Fast path: dict.get is atomic under the GIL, no lock needed once the instance exists
+        instance = cls._instances.get(device_id)
+        if instance is not None:
+            return instance
+        
+        with cls._lock:
+            # Re-check under the lock in case another thread created it first
+            instance = cls._instances.get(device_id)
+            if instance is None:
+                instance = cls(device_id, config=config, _use_registry=True)
+                cls._instances[device_id] = instance
                 logger.debug(f"Created new ADBHandler instance for device: {device_id}")
-            else:
-                logger.debug(f"Reusing existing ADBHandler instance for device: {device_id}")
-                
-            return cls._instances[device_id]
+            return instance
     
-    def __init__(self, device_id=None, _use_registry=False):
+    def __init__(self, device_id=None, config=None, _use_registry=False):
         """
         Initialize the ADBHandler
+        The config parameter lets callers that already hold the Config pass it through
         The _use_registry parameter is used internally to prevent direct instantiation
         """
         # Enforce using the get_instance pattern
-        if not _use_registry:
+        if __debug__ and not _use_registry:
             logger.warning("Direct instantiation of ADBHandler is deprecated. Use ADBHandler.get_instance() instead.")
         
-        config = get_config()
+        config = config or get_config()
         self.device_id = device_id or config.adb_device_id
         self.config = config
         
@@ -85,15 +138,22 @@ class ADBHandler:
                     logger.error(f"Invalid IP address format: {self.device_id}")
                     self.device_ip = None
         
+        # In-process ADB session over TCP (used for health checks and shell commands)
+        self._adb = None
+        self._signer = None
+        if self.device_ip:
+            try:
+                self._adb = AdbDeviceTcp(self.device_ip, int(self.device_port), default_transport_timeout_s=9.0)
+            except ValueError:
+                logger.error(f"Invalid ADB port: {self.device_port}")
+                self.device_ip = None
+        
         # Connection state
         self.connected = False
         self.connection_lock = threading.RLock()  # Lock for connection operations
-        self.last_connection_attempt = 0  # Timestamp of last connection attempt
+        self.last_connection_attempt = 0  # time.monotonic() of last connection attempt
         self.connection_backoff = 1  # Initial backoff time in seconds
         
-        # Persistent connection process
-        self.persistent_process = None
-        
         # Process handle for logcat
         self.logcat_process = None
         self.is_monitoring = False
@@ -105,14 +165,18 @@ class ADBHandler:
         Unified method to ensure device is connected
         
         Args:
-            force: If True, restart ADB server even if connection exists
+            force: If True, reconnect even if connection exists
             timeout: Connection timeout in seconds
             
         Returns:
             bool: Whether connection is established
         """
+        if not force and self.connected and time.monotonic() < self.last_connection_attempt + self.connection_backoff:
+            # Lock-free fast path: connected and still inside the backoff window
+            return True
+        
         with self.connection_lock:
-            current_time = time.time()
+            current_time = time.monotonic()
             
             # Skip if we already tried recently (unless forced)
             if not force and current_time - self.last_connection_attempt < self.connection_backoff:
@@ -123,33 +187,14 @@ class ADBHandler:
             self.last_connection_attempt = current_time
             
             # If we're already connected and not forced, do a quick check
-            if self.connected and not force and self.persistent_process and self.persistent_process.poll() is None:
-                try:
-                    # Quick check to verify connection is responsive
-                    result = subprocess.run(
-                        ['adb', '-s', f"{self.device_ip}:{self.device_port}", 'shell', 'echo check'],
-                        timeout=timeout, capture_output=True, text=True, encoding='utf-8', errors='replace', check=False
-                    )
-                    if result.returncode == 0 and "check" in result.stdout:
-                        # Connection is good, reset backoff
-                        self.connection_backoff = 1
-                        return True
-                except Exception:
-                    # Connection check failed, proceed with reconnection
-                    pass
-            
-            # Stop any existing processes before reconnection
-            if self.persistent_process:
-                try:
-                    self.persistent_process.terminate()
-                    self.persistent_process.wait(timeout=2)
-                except:
-                    pass
-                self.persistent_process = None
+            if self.connected and not force and self._check_alive(timeout):
+                # Connection is good, reset backoff
+                self.connection_backoff = 1
+                return True
             
-            # Restart ADB server if forced
-            if force:
-                self.restart_adb()
+            # Drop any existing session before reconnection; a fresh socket is all a
+            # forced reconnect needs
+            self._close_session()
             
             # Validate IP
             if not self.device_ip:
@@ -160,29 +205,11 @@ class ADBHandler:
             # Establish connection
             logger.info(f"Connecting to device {self.device_ip}:{self.device_port} (timeout: {timeout}s)")
             try:
-                # Connect the device
-                result = subprocess.run(
-                    ['adb', 'connect', f"{self.device_ip}:{self.device_port}"], 
-                    timeout=timeout, capture_output=True, text=True, encoding='utf-8', errors='replace'
-                )
-                
-                if "connected" not in result.stdout.lower() and "already connected" not in result.stdout.lower():
-                    logger.error(f"Failed to connect: {result.stdout}")
-                    self.connected = False
-                    # Increase backoff for next attempt (cap at 30 seconds)
-                    self.connection_backoff = min(self.connection_backoff * 2, 30)
-                    return False
-                
-                # Start persistent shell process to keep connection alive
-                self.persistent_process = subprocess.Popen(
-                    ['adb', '-s', f"{self.device_ip}:{self.device_port}", 'shell', 
-                     'while true; do echo ping; sleep 5; done'],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    encoding='utf-8',
-                    errors='replace'
-                )
+                # Open the in-process session; the TCP socket stays open between commands
+                if self._signer is None:
+                    self._signer = load_adb_signer()
+                self._adb.connect(rsa_keys=[self._signer], transport_timeout_s=timeout, auth_timeout_s=timeout)
+                self._tune_session_socket()
                 
                 self.connected = True
                 # Reset backoff on success
@@ -190,62 +217,107 @@ class ADBHandler:
                 logger.info(f"Successfully connected to {self.device_ip}:{self.device_port}")
                 return True
                 
-            except subprocess.TimeoutExpired:
+            except (AdbTimeoutError, TimeoutError):
                 logger.error(f"Connection timed out after {timeout}s")
+                self._close_session()
                 self.connected = False
                 # Increase backoff for next attempt (cap at 30 seconds)
                 self.connection_backoff = min(self.connection_backoff * 2, 30)
                 return False
             except Exception as e:
                 logger.error(f"Connection error: {e}")
+                self._close_session()
                 self.connected = False
                 # Increase backoff for next attempt (cap at 30 seconds)
                 self.connection_backoff = min(self.connection_backoff * 2, 30)
                 return False
 
-    def start_persistent_connection(self):
-        """Start a persistent ADB shell connection"""
-        # This is now just a wrapper around ensure_connection for backward compatibility
-        return self.ensure_connection(force=False, timeout=5)
+    def _connect_adb_server(self, timeout=5):
+        """Register the device with the local adb server, which serves the logcat stream"""
+        try:
+            # Raw bytes: only a substring check is needed, so skip decoding
+            result = subprocess.run(
+                ['adb', 'connect', f"{self.device_ip}:{self.device_port}"], 
+                timeout=timeout, capture_output=True
+            )
+        except Exception as e:
+            logger.error(f"adb server connect error: {e}")
+            return False
+        
+        # Matches both "connected to ..." and "already connected to ..."
+        if b"connected" not in result.stdout.lower():
+            logger.error(f"adb server failed to connect: {result.stdout.decode('utf-8', errors='replace')}")
+            return False
+        return True
+
+    def _check_alive(self, timeout=2):
+        """Run a quick round trip over the in-process session"""
+        if self._adb is None or not self._adb.available:
+            return False
+        try:
+            # stat goes through adbd's sync service, so unlike a shell command
+            # it doesn't fork a shell on the device
+            with self.connection_lock:
+                mode, _, _ = self._adb.stat('/', transport_timeout_s=timeout, read_timeout_s=timeout)
+            return mode != 0
+        except Exception:
+            return False
+
+    def _session_socket(self):
+        """Return the TCP socket behind the in-process session, or None if it isn't reachable"""
+        # adb_shell keeps the transport behind its I/O manager (older releases on the device itself)
+        transport = getattr(getattr(self._adb, '_io_manager', None), '_transport', None) \
+            or getattr(self._adb, '_transport', None)
+        return getattr(transport, '_connection', None)
+
+    def _tune_session_socket(self):
+        """Apply SESSION_SOCKET_OPTIONS to the in-process session socket"""
+        sock = self._session_socket()
+        if sock is None:
+            return
+        for level, name, value in SESSION_SOCKET_OPTIONS:
+            option = getattr(socket, name, None)
+            if option is None:
+                continue
+            try:
+                sock.setsockopt(level, option, value)
+            except OSError as e:
+                logger.debug(f"Could not set {name} on ADB session socket: {e}")
 
-    def connect(self):
-        """Establish connection to the device"""
-        # This is now just a wrapper around ensure_connection for backward compatibility
-        return self.ensure_connection(force=False, timeout=5)
+    def _close_session(self):
+        """Close the in-process ADB session if it is open"""
+        if self._adb is not None:
+            try:
+                self._adb.close()
+            except Exception:
+                pass
+
+    # Backward-compatible names for ensure_connection (same defaults: force=False, timeout=5)
+    start_persistent_connection = ensure_connection
+    connect = ensure_connection
 
     def is_device_connected(self):
         """Check if ADB device is connected"""
         with self.connection_lock:
-            # First check if our process is still running
-            if self.persistent_process and self.persistent_process.poll() is None:
-                # It's running, but do a quick check only if it's been a while since our last check
-                current_time = time.time()
+            # First check if our session is still open
+            if self._adb is not None and self._adb.available:
+                # It's open, but do a quick check only if it's been a while since our last check
+                current_time = time.monotonic()
                 if current_time - self.last_connection_attempt > 30:  # Check every 30 seconds
-                    try:
-                        result = subprocess.run(
-                            ['adb', '-s', f"{self.device_ip}:{self.device_port}", 'shell', 'echo check'],
-                            timeout=2, capture_output=True, text=True, encoding='utf-8', errors='replace', check=False
-                        )
-                        if result.returncode == 0 and "check" in result.stdout:
-                            self.connected = True
-                            return True
-                        else:
-                            # Process is running but not responsive
-                            self.connected = False
-                            return self.ensure_connection()
-                    except:
-                        # Quick check failed, try reconnection with minimal timeout
-                        return self.ensure_connection(timeout=2)
+                    if self._check_alive(timeout=2):
+                        self.connected = True
+                        return True
+                    # Session is open but not responsive, reconnect with minimal timeout
+                    self.connected = False
+                    return self.ensure_connection(timeout=2)
                 # If we checked recently, use cached state
                 return self.connected
             else:
-                # Process isn't running, try to connect with minimal timeout
+                # Session isn't open, try to connect with minimal timeout
                 return self.ensure_connection(timeout=2)
 
-    def force_connect(self):
-        """Try to reconnect to a lost device by restarting ADB server first"""
-        # Use our unified connection method with force=True
-        return self.ensure_connection(force=True, timeout=10)
+    # Try to reconnect to a lost device with a fresh session
+    force_connect = functools.partialmethod(ensure_connection, force=True, timeout=10)
 
     def execute_command(self, cmd):
         """Execute an ADB shell command"""
@@ -255,27 +327,21 @@ class ADBHandler:
             return None
                 
         try:
-            result = subprocess.run(
-                ['adb', '-s', f"{self.device_ip}:{self.device_port}", 'shell', cmd],
-                timeout=15, capture_output=True, text=True, encoding='utf-8', errors='replace', check=False
-            )
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                logger.error(f"Command failed: {result.stderr}")
-                return None
+            with self.connection_lock:
+                return self._adb.shell(cmd, timeout_s=15)
         except Exception as e:
             logger.error(f"Error executing command: {str(e)}")
             self.connected = False
             return None
 
     def restart_adb(self):
-        """Restart ADB server"""
+        """Restart the local ADB server (only the logcat stream depends on it)"""
         logger.info("Restarting ADB server...")
         try:
-            subprocess.run(["adb", "kill-server"], timeout=5, capture_output=True, text=True, encoding='utf-8', errors='replace')
-            time.sleep(1)
-            subprocess.run(["adb", "start-server"], timeout=5, capture_output=True, text=True, encoding='utf-8', errors='replace')
+            # kill-server returns once the server has exited and start-server once it is
+            # listening again, so no extra wait is needed in between
+            subprocess.run(["adb", "kill-server"], timeout=5, **_QUIET_RUN)
+            subprocess.run(["adb", "start-server"], timeout=5, **_QUIET_RUN)
             return True
         except Exception as e:
             logger.error(f"Failed to restart ADB: {str(e)}")
@@ -293,11 +359,18 @@ class ADBHandler:
         tags = self.config.adb_logcat_tags
         filter_pattern = self.config.adb_logcat_pattern
         
+        # The logcat stream runs through the adb server rather than our in-process session;
+        # restart the server as a last resort if it can't reach the device
+        if not self._connect_adb_server(timeout=5):
+            if not (self.restart_adb() and self._connect_adb_server(timeout=5)):
+                logger.error("adb server could not reach the device, cannot start logcat")
+                return None
+        
         try:
             # Clear logcat buffer first 
-            clear_result = subprocess.run(
+            subprocess.run(
                 ['adb', '-s', f"{self.device_ip}:{self.device_port}", 'logcat', '-c'],
-                timeout=5, capture_output=True, text=True, encoding='utf-8', errors='replace'
+                timeout=5, **_QUIET_RUN
             )
             
             # Build the logcat command
@@ -309,13 +382,12 @@ class ADBHandler:
             ]
             
             # Start the process
+            # stdout is a binary pipe; the watcher decodes each line once.
+            # stderr is never read, so discard it rather than let an unread pipe fill up
             self.logcat_process = subprocess.Popen(
                 base_cmd,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                bufsize=1  # Line buffered
+                stderr=subprocess.DEVNULL
             )
             
             self.is_monitoring = True
@@ -364,11 +436,11 @@ class ADBHandler:
             }
         
         # If simple connection failed, try force connect
-        logger.info(f"Simple connection failed, trying to restart ADB server")
+        logger.info(f"Simple connection failed, trying to reconnect with a fresh session")
         if self.force_connect():
             return {
                 "status": "success",
-                "message": f"Successfully connected to device {self.device_id} after restarting ADB server",
+                "message": f"Successfully connected to device {self.device_id} after reconnecting",
                 "device_id": self.device_id
             }
         
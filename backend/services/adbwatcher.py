@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import time
 import threading
-import queue
+from collections import deque
 from datetime import datetime
 import logging
 
@@ -42,8 +42,8 @@ class ADBWatcher:
         self.last_processed_event = None
         self.last_event_time = 0
         
-        # Log buffer
-        self.log_buffer = queue.Queue(maxsize=1000)
+        # Log buffer (oldest lines drop off automatically once full)
+        self.log_buffer = deque(maxlen=1000)
         # Filtered log buffer for important events only
         self.filtered_logs = []
         self.log_thread = None
@@ -233,15 +233,11 @@ class ADBWatcher:
     #-------------------------------------------------
     def get_raw_logs(self, count=100):
         """Get recent raw logs from buffer"""
-        logs = []
-        # Create a copy of the queue to avoid modifying the original
-        temp_queue = self.log_buffer.queue.copy()
+        # Snapshot in one C-level copy so concurrent appends can't interrupt iteration
+        logs = list(self.log_buffer)
         
-        # Get the last 'count' logs
-        num_logs = min(count, len(temp_queue))
-        logs = list(temp_queue)[-num_logs:]
-        
-        return logs
+        # Get the last 'count' logs; lines are buffered as raw bytes, decode only these
+        return [line.decode('utf-8', errors='replace') for line in logs[max(0, len(logs) - count):]]
     
     def get_event_logs(self, count=50):
         """Get only important logs with original events and mapped paths"""
@@ -306,24 +302,25 @@ class ADBWatcher:
         logger.info("Logcat processor thread started")
         
         try:
+            # Bind the per-line calls once; this thread only ever reads the process it started with
+            process = self.process
+            readline = process.stdout.readline
+            process_entry = self._process_logcat_entry
+            
             while self.is_running and self.process:
-                # Read from process stdout
+                # Read from process stdout (bytes, decoded in _process_logcat_entry)
                 try:
-                    line = self.process.stdout.readline()
+                    line = readline()
                     if not line:
                         # Empty line might indicate process has ended
-                        if self.process.poll() is not None:
+                        if process.poll() is not None:
                             logger.warning("Logcat processor thread has ended")
                             break
                         continue
                     
                     # Process the log line
-                    self._process_logcat_entry(line)
+                    process_entry(line)
                         
-                except UnicodeDecodeError as e:
-                    logger.error(f"Unicode decode error reading logcat line: {str(e)}")
-                    # Continue processing other lines
-                    continue
                 except Exception as e:
                     logger.error(f"Error reading logcat line: {str(e)}")
         except Exception as e:
@@ -333,33 +330,17 @@ class ADBWatcher:
 
     def _process_logcat_entry(self, line):
         """Process a log line from the device"""
-        # Ensure line is properly decoded
-        try:
-            if isinstance(line, bytes):
-                line = line.decode('utf-8', errors='replace')
-            elif not isinstance(line, str):
-                line = str(line)
-        except Exception as e:
-            logger.error(f"Error decoding log line: {str(e)}")
-            return
+        # Add the raw bytes to the buffer; get_raw_logs() decodes on request
+        self.log_buffer.append(line)
         
-        # Add to buffer
-        try:
-            self.log_buffer.put_nowait(line)
-        except queue.Full:
-            # If buffer is full, remove oldest item
-            try:
-                self.log_buffer.get_nowait()
-                self.log_buffer.put_nowait(line)
-            except:
-                pass
-        
-        # Since we're already filtering in ADB command, process all lines for START events
-        if "START" in line and "cmp=" in line:
+        # Since we're already filtering in ADB command, process all lines for START events.
+        # Match on the raw bytes so only START lines get decoded
+        if b"START" in line and b"cmp=" in line:
+            line = line.decode('utf-8', errors='replace')
             logger.debug(f"Processing logcat line: {line}")
             
             # Extract the video path
-            video_path = parse_video_path(line, self.config.path_mappings)
+            video_path = parse_video_path(line, self.config.path_mappings_compiled)
             
             if video_path:
                 # Check for duplicate events within cooldown period